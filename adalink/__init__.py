@@ -1,3 +1,3 @@
-# Adalink tool version.  Will be used in the setup.py script and shown with
-# the --version command line parameter.
-__version__ = '2.5.0'
+# The version lives in its own module so setup.py can read it without
+# importing the rest of adalink.
+from ._version import __version__
@@ -0,0 +1,3 @@
+# Adalink tool version.  Will be used in the setup.py script and shown with
+# the --version command line parameter.
+__version__ = '2.5.0'
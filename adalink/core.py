@@ -1,5 +1,6 @@
 # Core base class
 import os
+import stat
 import functools
 import argparse
 
@@ -12,21 +13,32 @@ class PathType:
         self._type = type
 
     def __call__(self, string):
-        e = os.path.exists(string)
+        # Stat the path once and derive every check from the result.
         if self._exists==True:
-            if not e:
+            try:
+                st = os.stat(string)
+            except OSError:
                 raise argparse.ArgumentTypeError("path does not exist: '{}'".format(string))
 
-            if not os.path.isfile(string):
+            if not stat.S_ISREG(st.st_mode):
                 raise argparse.ArgumentTypeError("path is not a file: '{}'".format(string))
         else:
             p = os.path.dirname(os.path.normpath(string)) or '.'
 
-            if not os.path.exists(p) or not os.path.isdir(p):
+            try:
+                is_dir = stat.S_ISDIR(os.stat(p).st_mode)
+            except OSError:
+                is_dir = False
+            if not is_dir:
                 raise argparse.ArgumentTypeError("parent directory does not exist: '{}'".format(p))
         return string
 
 
+# Shared, stateless argument types used by every core's subparser.
+_EXISTING_FILE = PathType(exists=True)
+_INT_BASE0 = functools.partial(int, base=0)
+
+
 class ProgramBinArgs(argparse.Action):
     "Action to process argument pairs as File, int and append them"
     def __call__(self, parser, namespace, values, option_string=None):
@@ -34,7 +46,7 @@ class ProgramBinArgs(argparse.Action):
             items = getattr(namespace, self.dest, None)
             if items is None:
                 items = []
-            items.append((PathType(exists=True)(values[0]), int(values[1], base=0)))
+            items.append((_EXISTING_FILE(values[0]), int(values[1], base=0)))
             setattr(namespace, self.dest, items)
         except argparse.ArgumentTypeError as e:  # in actions ArgumentTypeError is not formatted correctly
             raise argparse.ArgumentError(self, e)
@@ -114,7 +126,7 @@ class Core:
         parser.add_argument(
             '-h', '--program-hex',
             action='append',
-            type=PathType(exists=True),
+            type=_EXISTING_FILE,
             help='Program the specified .hex file. Can be specified multiple times.',
         )
         parser.add_argument(
@@ -129,19 +141,19 @@ class Core:
         )
         parser.add_argument(
             '-r8', '--read-mem-8',
-            type=functools.partial(int, base=0),
+            type=_INT_BASE0,
             metavar='ADDRESS',
             help='Read 1 byte of memory from the specified address (can be hex, like 0x1234ABCD).',
         )
         parser.add_argument(
             '-r16', '--read-mem-16',
-            type=functools.partial(int, base=0),
+            type=_INT_BASE0,
             metavar='ADDRESS',
             help='Read 2 bytes of memory from the specified address (can be hex, like 0x1234ABCD).',
         )
         parser.add_argument(
             '-r32', '--read-mem-32',
-            type=functools.partial(int, base=0),
+            type=_INT_BASE0,
             metavar='ADDRESS',
             help='Read 4 bytes of memory from the specified address (can be hex, like 0x1234ABCD).',
         )
@@ -16,3 +16,8 @@ from . import nrf51822
 from . import nrf52832
 from . import nrf52840
 from . import stm32f2
+
+# Map of command line name to Core subclass for every imported core.  Cores are
+# only instantiated (and their argument parsers built) when actually selected.
+from ..core import Core
+CORES = {core.__name__.lower(): core for core in Core.__subclasses__()}
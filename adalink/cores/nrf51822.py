@@ -145,7 +145,7 @@ class nRF51822_JLink(JLink):
             'w4 4001e504, 1', # Enable writing
             'sleep 100',      # Wait again.
             'r',              # Reset
-            'q'               # Quit
+            'qc'              # Close connection and quit
         ]
         self.run_commands(commands)
 
@@ -63,7 +63,7 @@ class nRF52832_JLink(JLink):
             'erase',          # Erase all
             'sleep 100',      # Wait again
             'r',              # Reset
-            'q'               # Quit
+            'qc'              # Close connection and quit
         ]
         self.run_commands(commands)
 
@@ -89,38 +89,50 @@ class nRF52832(Core):
 
     def info(self, programmer):
         """Display info about the device."""
+        # Read every register needed below with a single JLinkExe run, rather
+        # than starting JLinkExe again for each register.
+        regs = programmer.readmem_batch([
+            (0x10000100, 32),
+            (0x10000104, 32),
+            (0x10000108, 16),
+            (0x1000010C, 8),
+            (0x10000110, 16),
+            (0x100000a8, 32),
+            (0x100000a4, 32),
+            (0x10000060, 32),
+            (0x10000064, 32),
+            (0x1000120C, 32),
+        ])
         # Get the HWID register value and print it.
-        # Note for completeness there are also readmem32 and readmem8 functions
-        # available to use for reading memory values too.
-        hwid = programmer.readmem32(0x10000100)
+        hwid = regs[0x10000100]
         print('Hardware ID : 0x{0:05X}'.format(hwid))
         # Get the chip variant
-        variant = programmer.readmem32(0x10000104)
+        variant = regs[0x10000104]
         print('Variant     : {0}'.format(MCU_LOOKUP.get(variant, '0x{0:05X}'.format(variant))))
         # Get the Package ID
-        package = programmer.readmem16(0x10000108)
+        package = regs[0x10000108]
         pkgstring = PACKAGE_LOOKUP.get(package, '0x{0:04X}'.format(package))
         if '0x' not in pkgstring:
             print('Package     : {0}'.format(pkgstring))
         else:
             print('Package     : 0x{0:04X}'.format(package))
         # Get the SRAM
-        sram = programmer.readmem8(0x1000010C)
+        sram = regs[0x1000010C]
         sramstring = SRAM_LOOKUP.get(sram, '0x{0:02X}'.format(package))
         if '0x' not in sramstring:
             print('SRAM        : {0}'.format(sramstring))
         else:
             print('SRAM        : 0x{0:02X}'.format(sram))
         # Get the Flash size
-        flash = programmer.readmem16(0x10000110)
+        flash = regs[0x10000110]
         flashstring = FLASH_LOOKUP.get(flash, '0x{0:04X}'.format(package))
         if '0x' not in flashstring:
             print('Flash       : {0}'.format(flashstring))
         else:
             print('Flash       : 0x{0:04X}'.format(flash))
         # Get the BLE Address and print it.
-        addr_high = (programmer.readmem32(0x100000a8) & 0x0000ffff) | 0x0000c000
-        addr_low  = programmer.readmem32(0x100000a4)
+        addr_high = (regs[0x100000a8] & 0x0000ffff) | 0x0000c000
+        addr_low  = regs[0x100000a4]
         print('Device Addr : {0:02X}:{1:02X}:{2:02X}:{3:02X}:{4:02X}:{' \
                    '5:02X}'.format((addr_high >> 8) & 0xFF,
                                    (addr_high) & 0xFF,
@@ -129,11 +141,11 @@ class nRF52832(Core):
                                    (addr_low >> 8) & 0xFF,
                                    (addr_low & 0xFF)))
         # Get device ID.
-        did_high = programmer.readmem32(0x10000060)
-        did_low  = programmer.readmem32(0x10000064)
+        did_high = regs[0x10000060]
+        did_low  = regs[0x10000064]
         print('Device ID   : {0:08X}{1:08X}'.format(did_high, did_low))
         # Check the UICR NFCPINS register to determine NFC pin status
-        nfcpins = programmer.readmem32(0x1000120C)
+        nfcpins = regs[0x1000120C]
         if nfcpins == 0xFFFFFFFF:
             print('NFC Pins    : NFC')
         else:
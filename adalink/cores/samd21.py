@@ -45,6 +45,34 @@ VARIANT_LOOKUP = {
 }
 
 
+def _build_openocd_program_commands(escape_path, hex_files, bin_files):
+    """Build the list of OpenOCD commands to load and then verify the provided
+    hex/bin files on a SAMD21.  Escape_path is the programmer's function to
+    escape a file path for use in an OpenOCD command."""
+    commands = [
+        'init',
+        'reset init'
+    ]
+    # Resolve and escape each file path once, it's used to both load and verify.
+    hex_escaped = [escape_path(os.path.abspath(f)) for f in hex_files]
+    bin_escaped = [(escape_path(os.path.abspath(f)), addr) for f, addr in bin_files]
+    # Program each hex file.
+    for f in hex_escaped:
+        commands.append('load_image {0} 0 ihex'.format(f))
+    # Program each bin file.
+    for f, addr in bin_escaped:
+        commands.append('load_image {0} 0x{1:08X} bin'.format(f, addr))
+    # Verify each hex file.
+    for f in hex_escaped:
+        commands.append('verify_image {0} 0 ihex'.format(f))
+    # Verify each bin file.
+    for f, addr in bin_escaped:
+        commands.append('verify_image {0} 0x{1:08X} bin'.format(f, addr))
+    commands.append('reset run')
+    commands.append('exit')
+    return commands
+
+
 class STLink_SAMD21(STLink):
     # SAMD21-specific STLink-based programmer.  Required to add custom
     # wipe function, and to use the load_image command for programming (the
@@ -71,35 +99,15 @@ class STLink_SAMD21(STLink):
         # Program the SAMD21 with the provided hex/bin files.
         print('WARNING: Make sure the provided hex/bin files are padded with ' \
             'at least 64 bytes of blank (0xFF) data!  This will work around a cache bug with OpenOCD 0.9.0.')
-        commands = [
-            'init',
-            'reset init'
-        ]
-        # Program each hex file.
-        for f in hex_files:
-            f = self.escape_path(os.path.abspath(f))
-            commands.append('load_image {0} 0 ihex'.format(f))
-        # Program each bin file.
-        for f, addr in bin_files:
-            f = self.escape_path(os.path.abspath(f))
-            commands.append('load_image {0} 0x{1:08X} bin'.format(f, addr))
-        # Verify each hex file.
-        for f in hex_files:
-            f = self.escape_path(os.path.abspath(f))
-            commands.append('verify_image {0} 0 ihex'.format(f))
-        # Verify each bin file.
-        for f, addr in bin_files:
-            f = self.escape_path(os.path.abspath(f))
-            commands.append('verify_image {0} 0x{1:08X} bin'.format(f, addr))
-        commands.append('reset run')
-        commands.append('exit')
-        # Run commands.
-        output = self.run_commands(commands)
-        # Check that expected number of files were verified.  Look for output lines
-        # that start with 'verified ' to signal OpenOCD output that the verification
-        # succeeded.  Count up these lines and expect they match the number of
-        # programmed files.
-        verified = len(filter(lambda x: x.startswith('verified '), output.splitlines()))
+        commands = _build_openocd_program_commands(self.escape_path, hex_files, bin_files)
+        # Run commands and check that expected number of files were verified.
+        # Look for output lines that start with 'verified ' to signal OpenOCD
+        # output that the verification succeeded.  Count up these lines as they
+        # are streamed and expect they match the number of programmed files.
+        verified = 0
+        for line in self.run_commands_stream(commands):
+            if line.startswith('verified '):
+                verified += 1
         if verified != (len(hex_files) + len(bin_files)):
             raise AdaLinkError('Failed to verify all files were programmed!')
 
@@ -130,35 +138,15 @@ class RasPi2_SAMD21(RasPi2):
         # Program the SAMD21 with the provided hex/bin files.
         print('WARNING: Make sure the provided hex/bin files are padded with ' \
             'at least 64 bytes of blank (0xFF) data!  This will work around a cache bug with OpenOCD 0.9.0.')
-        commands = [
-            'init',
-            'reset init'
-        ]
-        # Program each hex file.
-        for f in hex_files:
-            f = self.escape_path(os.path.abspath(f))
-            commands.append('load_image {0} 0 ihex'.format(f))
-        # Program each bin file.
-        for f, addr in bin_files:
-            f = self.escape_path(os.path.abspath(f))
-            commands.append('load_image {0} 0x{1:08X} bin'.format(f, addr))
-        # Verify each hex file.
-        for f in hex_files:
-            f = self.escape_path(os.path.abspath(f))
-            commands.append('verify_image {0} 0 ihex'.format(f))
-        # Verify each bin file.
-        for f, addr in bin_files:
-            f = self.escape_path(os.path.abspath(f))
-            commands.append('verify_image {0} 0x{1:08X} bin'.format(f, addr))
-        commands.append('reset run')
-        commands.append('exit')
-        # Run commands.
-        output = self.run_commands(commands)
-        # Check that expected number of files were verified.  Look for output lines
-        # that start with 'verified ' to signal OpenOCD output that the verification
-        # succeeded.  Count up these lines and expect they match the number of
-        # programmed files.
-        verified = len(filter(lambda x: x.startswith('verified '), output.splitlines()))
+        commands = _build_openocd_program_commands(self.escape_path, hex_files, bin_files)
+        # Run commands and check that expected number of files were verified.
+        # Look for output lines that start with 'verified ' to signal OpenOCD
+        # output that the verification succeeded.  Count up these lines as they
+        # are streamed and expect they match the number of programmed files.
+        verified = 0
+        for line in self.run_commands_stream(commands):
+            if line.startswith('verified '):
+                verified += 1
         if verified != (len(hex_files) + len(bin_files)):
             raise AdaLinkError('Failed to verify all files were programmed!')
 
@@ -178,17 +166,19 @@ class SAMD21(Core):
         """Create and return a programmer instance that will be used to program
         the core.  Must be implemented by subclasses!
         """
+        # Look up the JLink device and OpenOCD chip names for the variant once,
+        # falling back to the default samd21g18 names.
+        jlink_device, openocd_chipname = VARIANT_LOOKUP.get(
+            self.variant, VARIANT_LOOKUP['samd21g18'])
         if programmer == 'jlink':
             return JLink(
                 'Cortex-M0 r0p1, Little endian',
-                params='-device {} -if swd -speed 1000'.format(
-                    VARIANT_LOOKUP.get(self.variant, ('ATSAMD21G18',))[0]
-                )
+                params='-device {} -if swd -speed 1000'.format(jlink_device)
             )
         elif programmer == 'stlink':
-            return STLink_SAMD21(VARIANT_LOOKUP.get(self.variant, ('', 'at91samd21g18'))[1])
+            return STLink_SAMD21(openocd_chipname)
         elif programmer == 'raspi2':
-            return RasPi2_SAMD21(VARIANT_LOOKUP.get(self.variant, ('', 'at91samd21g18'))[1])
+            return RasPi2_SAMD21(openocd_chipname)
 
     def add_subparser(self, subparsers):
         "Add the variant option to the bottom of the standard list of options"
@@ -208,15 +198,14 @@ class SAMD21(Core):
 
     def info(self, programmer):
         """Display info about the device."""
+        # The 128-bit serial number is held in four 32-bit words, read each word
+        # once and split it into its (little endian) 16-bit halves.
+        words = [programmer.readmem32(address) for address in
+                 (0x0080A00C, 0x0080A040, 0x0080A044, 0x0080A048)]
+        halves = []
+        for word in words:
+            halves.extend(((word >> 16) & 0xFFFF, word & 0xFFFF))
         print('Serial No.: {0:04X}:{1:04X}:{2:04X}:{3:04X}:{4:04X}:{5:04X}:{6:04X}:{7:04X}'.format(
-            programmer.readmem16(0x0080A00E),
-            programmer.readmem16(0x0080A00C),
-            programmer.readmem16(0x0080A042),
-            programmer.readmem16(0x0080A040),
-            programmer.readmem16(0x0080A046),
-            programmer.readmem16(0x0080A044),
-            programmer.readmem16(0x0080A04A),
-            programmer.readmem16(0x0080A048),
-        ))
+            *halves))
         print('Device ID : {0}'.format(DEVSEL_CHIPNAME_LOOKUP.get(
                 programmer.readmem8(0x41002018), 'Reserved')))
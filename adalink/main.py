@@ -1,14 +1,12 @@
 import logging
-import os
-import platform
 import argparse
 
 from . import __version__
-from .core import Core
 from .errors import AdaLinkError
 
 # Import all the cores. MUST be a * reference to ensure all the cores are dynamically loaded.
 from .cores import *
+from .cores import CORES
 
 
 def main():
@@ -24,12 +22,29 @@ def main():
 
     To use the Raspi programmer you MUST have OpenOCD 0.9.0+ installed on the Pi with --enable-bcm2835gpio compiled.
     """
-    # Hack to work-around bug in Mac OSX Yosemite where launchd does not set
-    # the patch correctly for GUI apps.  See:
-    #   http://apple.stackexchange.com/questions/153402/in-osx-yosemite-why-can-i-set-many-environment-variables-for-gui-apps-but-cann
-    if platform.system() == 'Darwin':
-        os.environ["PATH"] = os.environ["PATH"] + ':/usr/local/bin'
+    # Parse in two passes so only the chosen core has its full set of options
+    # built.  The first pass just works out which core (if any) was selected.
+    args, _ = _build_parser().parse_known_args()
+    parser = _build_parser(getattr(args, 'core', None))
+    args = parser.parse_args()
+
+    # Enable verbose debug output if required.
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+
+    if 'func' in args:
+        try:
+            args.func(args)
+        except AdaLinkError as e:
+            print(e)
+    else:
+        parser.print_help()
+
 
+def _build_parser(selected=None):
+    """Build the command line parser.  Every core is listed as a choice but
+    only the selected core (if any) is instantiated to add its full subparser,
+    the rest get a cheap placeholder entry."""
     parser = argparse.ArgumentParser(description=__doc__, allow_abbrev=False)
 
     parser.add_argument(
@@ -45,22 +60,13 @@ def main():
 
     subparsers = parser.add_subparsers(title="Cores", metavar='CORE')
 
-    for core in Core.__subclasses__():
-        core().add_subparser(subparsers)
-
-    args = parser.parse_args()
-
-    # Enable verbose debug output if required.
-    if args.verbose:
-        logging.basicConfig(level=logging.DEBUG)
-
-    if 'func' in args:
-        try:
-            args.func(args)
-        except AdaLinkError as e:
-            print(e)
-    else:
-        parser.print_help()
+    for name, core in CORES.items():
+        if name == selected:
+            core().add_subparser(subparsers)
+        else:
+            placeholder = subparsers.add_parser(name, help=core.__doc__, add_help=False)
+            placeholder.set_defaults(core=name)
+    return parser
 
 
 if __name__ == '__main__':
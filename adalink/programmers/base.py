@@ -6,6 +6,23 @@
 #
 # Author: Tony DiCola
 import abc
+import os
+import platform
+
+
+def _tool_env():
+    """Return the environment to run programmer tools (JLinkExe, OpenOCD) with,
+    or None to inherit the current process environment.
+
+    OSX GUI-based app does not has the same PATH as terminal-based, so there the
+    usual install locations are added to the tool's PATH.  The process
+    environment itself is never modified.
+    """
+    if platform.system() != 'Darwin':
+        return None
+    env = dict(os.environ)
+    env['PATH'] = os.environ.get('PATH', '') + ':/usr/local/bin:/opt/homebrew/bin'
+    return env
 
 
 class Programmer(object):
@@ -9,24 +9,53 @@
 # provided to the JLink class initializer).
 #
 # Author: Tony DiCola
+import collections
 import logging
 import os
 import platform
 import re
+import shutil
 import sys
 import subprocess
-import tempfile
+import threading
 import time
 
-from .base import Programmer
+from .base import Programmer, _tool_env
 from ..errors import AdaLinkError
 
-# OSX GUI-based app does not has the same PATH as terminal-based
-if platform.system() == 'Darwin':
-    os.environ["PATH"] = os.environ["PATH"] + ':/usr/local/bin'
+logger = logging.getLogger(__name__)
 
+# Matches the 'ADDRESS = VALUE' lines JLinkExe prints for each memory read.
+_MEM_RE = re.compile(rb'^([0-9A-F]{8}) = (\S+)', re.IGNORECASE | re.MULTILINE)
+# Matches the connection failure message, target reference voltage and found
+# cores that JLinkExe reports when connecting.  Found core names stop at a '.'
+# or the end of the line so anything after them on the line is still scanned.
+_CONNECT_RE = re.compile(rb'(FAILED)|VTref=([0-9.]+)V|Found ([^\r\n.]*)')
 
-logger = logging.getLogger(__name__)
+# Default JLinkExe executable name for each supported platform.
+_SYSTEM = platform.system()
+_JLINK_EXE_FOR_SYSTEM = {
+    'Linux':   'JLinkExe',
+    'Darwin':  'JLinkExe',
+    'Windows': 'JLink.exe',
+}
+
+# A JLinkExe process started by JLink.submit, along with the time.monotonic()
+# deadline (or None for no timeout) it must finish by when reaped.
+JLinkRun = collections.namedtuple('JLinkRun', ['process', 'deadline'])
+
+
+def _feed_stdin(fd, data):
+    """Write data to the provided pipe file descriptor and then close it.  If
+    the reading process exits early the rest of the data is dropped."""
+    data = memoryview(data)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    except BrokenPipeError:
+        pass
+    finally:
+        os.close(fd)
 
 
 class JLink(Programmer):
@@ -48,120 +77,166 @@ class JLink(Programmer):
         """
         self._connected = connected
         # If not provided, pick the appropriate JLinkExe name based on the
-        # platform:
-        # - Linux   = JLinkExe
-        # - Mac     = JLinkExe
-        # - Windows = JLink.exe
+        # platform (MINGW shells use the Windows name).
         if jlink_exe is None:
-            system = platform.system()
-            if system == 'Linux':
-                jlink_exe = 'JLinkExe'
-            elif system == 'Windows' or ("MINGW" in system):
+            jlink_exe = _JLINK_EXE_FOR_SYSTEM.get(_SYSTEM)
+            if jlink_exe is None and 'MINGW' in _SYSTEM:
                 jlink_exe = 'JLink.exe'
-            elif system == 'Darwin':
-                jlink_exe = 'JLinkExe'
-            else:
-                raise AdaLinkError('Unsupported system: {0}'.format(system))
+            if jlink_exe is None:
+                raise AdaLinkError('Unsupported system: {0}'.format(_SYSTEM))
+        # Run the tool with a PATH that can find it from OSX GUI-based apps too.
+        self._env = _tool_env()
         # Store the path to the JLinkExe tool so it can later be run.
         self._jlink_path = os.path.join(jlink_path, jlink_exe)
         logger.info('Using path to JLinkExe: {0}'.format(self._jlink_path))
-        # Apply command line parameters if specified.
-        self._jlink_params = ['-NoGui', '1']
+        # Apply command line parameters if specified, after the defaults that
+        # hide the GUI and make JLinkExe exit straight away if a command fails.
+        self._jlink_params = ('-NoGui', '1', '-ExitOnError', '1')
         if params is not None:
-            self._jlink_params.extend(params.split())
+            self._jlink_params += tuple(params.split())
             logger.info('Using parameters to JLinkExe: {0}'.format(params))
         # Make sure we have the J-Link executable in the system path
         self._test_jlinkexe()
+        # Build the fixed start of every JLinkExe command line once.
+        self._base_args = (self._jlink_path,) + self._jlink_params
 
     def _test_jlinkexe(self):
-        """Checks if JLinkExe is found in the system path or not."""
-        # Spawn JLinkExe process and capture its output.
-        args = [self._jlink_path]
-        script_file = tempfile.NamedTemporaryFile(mode='w', delete=False)
-        script_file.write('q')
-        script_file.close()
-        args.append(script_file.name)
-        try:
-            process = subprocess.Popen(args, stdout=subprocess.PIPE)
-            process.wait()
-        except OSError:
+        """Checks if JLinkExe is found in the system path or not.  If found,
+        the path to JLinkExe is resolved to the full path of the executable so
+        running it later doesn't need to search the PATH again."""
+        # Look the executable up instead of spawning it, starting JLinkExe is
+        # slow as it probes for connected JLink devices.
+        path = None if self._env is None else self._env['PATH']
+        jlink_path = shutil.which(self._jlink_path, path=path)
+        if jlink_path is None:
             raise AdaLinkError("'{0}' missing. Is the J-Link folder in your system "
                                "path?".format(self._jlink_path))
+        self._jlink_path = jlink_path
 
-    def run_filename(self, filename, timeout_sec=60):
-        """Run the provided script with JLinkExe.  Filename should be a path to
-        a script file with JLinkExe commands to run.  Returns the output of
-        JLinkExe.  If execution takes longer than timeout_sec an exception will
-        be thrown.  Set timeout_sec to None to disable the timeout completely.
+    def _spawn(self, args, stdin_bytes=None, timeout_sec=60):
+        """Start JLinkExe with the provided list of arguments, feeding it
+        stdin_bytes as input if specified.  Returns a JLinkRun for the running
+        process without waiting for it to finish.
+        """
+        # Spawn JLinkExe process, its output is captured when it's reaped.
+        stdin = None
+        if stdin_bytes is not None:
+            stdin, stdin_write = os.pipe()
+        process = subprocess.Popen(args, stdin=stdin, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, env=self._env)
+        if stdin_bytes is not None:
+            # Feed the script from a thread so JLinkExe starts running it right
+            # away, however much output it produces before reading all of it.
+            os.close(stdin)
+            feeder = threading.Thread(target=_feed_stdin, args=(stdin_write, stdin_bytes))
+            feeder.daemon = True
+            feeder.start()
+        deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+        return JLinkRun(process, deadline)
+
+    def submit(self, commands, timeout_sec=60):
+        """Start running the provided list of commands with JLinkExe and return
+        a JLinkRun without waiting for JLinkExe to finish.  Pass it to reap to
+        wait for JLinkExe and get its output.  If execution takes longer than
+        timeout_sec (counted from now) reap will throw an exception.  Set
+        timeout_sec to None to disable the timeout completely.  This allows
+        commands to run on several JLink devices at the same time, for example:
+
+            runs = [jlink.submit(commands) for jlink in jlinks]
+            outputs = [jlink.reap(run) for jlink, run in zip(jlinks, runs)]
         """
-        # Spawn JLinkExe process and capture its output.
-        args = [self._jlink_path]
-        args.extend(self._jlink_params)
-        args.append(filename)
-        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        # Pipe the script straight to JLinkExe's stdin instead of going through
+        # a temporary file.
+        commands = '\n'.join(commands) + '\n'
+        logger.debug('Running JLink commands: %s', commands)
+        return self._spawn(self._base_args, commands.encode('utf-8'), timeout_sec)
 
+    def reap(self, run):
+        """Wait for the JLinkExe run returned by submit to finish and return
+        its bytes output.  Throws an exception if the run's timeout is exceeded.
+        """
+        process, deadline = run
+        timeout_sec = None if deadline is None else max(0, deadline - time.monotonic())
         # Grab output of JLink.
         try:
             output, err = process.communicate(timeout=timeout_sec)
-        except TimeoutError:
+        except subprocess.TimeoutExpired:
+            # Kill JLinkExe so it doesn't keep holding on to the JLink device.
+            process.kill()
+            try:
+                process.communicate(timeout=1)
+            except Exception:
+                pass
             raise AdaLinkError('JLink process exceeded timeout!')
 
-        logger.debug('JLink response: {0}'.format(output.decode('utf-8')))
-        return output.decode('utf-8')
+        # Only decode the output when it will actually be logged.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('JLink response: %s', output.decode('utf-8', 'replace'))
+        return output
+
+    def run_filename(self, filename, timeout_sec=60):
+        """Run the provided script with JLinkExe.  Filename should be a path to
+        a script file with JLinkExe commands to run.  Returns the bytes output
+        of JLinkExe.  If execution takes longer than timeout_sec an exception will
+        be thrown.  Set timeout_sec to None to disable the timeout completely.
+        """
+        return self.reap(self._spawn(self._base_args + (filename,), timeout_sec=timeout_sec))
 
     def run_commands(self, commands, timeout_sec=60):
         """Run the provided list of commands with JLinkExe.  Commands should be
         a list of strings with with JLinkExe commands to run.  Returns the
-        output of JLinkExe.  If execution takes longer than timeout_sec an
+        bytes output of JLinkExe.  If execution takes longer than timeout_sec an
         exception will be thrown. Set timeout_sec to None to disable the timeout
         completely.
         """
-        # Create temporary file to hold script.
-        script_file = tempfile.NamedTemporaryFile(mode='w', delete=False)
-        # commands.insert(0, 'connect\n')
-        commands = '\n'.join(commands)
-        script_file.write(commands)
-        script_file.close()
-        logger.debug('Using script file name: {0}'.format(script_file.name))
-        logger.debug('Running JLink commands: {0}'.format(commands))
-        return self.run_filename(script_file.name, timeout_sec)
-
-    def _readmem(self, address, command):
-        """Read the specified register with the provided register read command.
+        return self.reap(self.submit(commands, timeout_sec))
+
+    def _readmem(self, reads):
+        """Read memory values with a single run of JLinkExe.  Reads should be a
+        list of (address, width) tuples where width is 8, 16 or 32 bits.
+        Returns a dict mapping each address to the value read from it.  Each
+        address can only be read once, as the values are keyed by address.
         """
-        # Build list of commands to read register.
-        address = '{0:08X}'.format(address)  # Convert address value to hex string.
-        commands = [
-            '{0} {1} 1'.format(command, address),
-            'q'
-        ]
-        # Run command and parse output for register value.
+        # JLinkExe output only identifies a value by its address, so reading the
+        # same address twice (e.g. at two widths) would lose one of the values.
+        if len(set(address for address, width in reads)) != len(reads):
+            raise AdaLinkError('Each address can only be read once per batch of memory reads.')
+        # Build list of commands to read every register.
+        commands = ['mem{0} {1:08X} 1'.format(width, address) for address, width in reads]
+        commands.append('qc')
+        # Run commands and parse output for all the register values.
         output = self.run_commands(commands)
-        match = re.search('^{0} = (\S+)'.format(address), output,
-                          re.IGNORECASE | re.MULTILINE)
-        if match:
-            return int(match.group(1), 16)
-        else:
+        values = {int(address, 16): int(value, 16) for address, value in _MEM_RE.findall(output)}
+        if any(address not in values for address, width in reads):
             raise AdaLinkError('Could not find expected memory value, are the JLink and board connected?')
+        return values
 
     def is_connected(self):
         """Return true if the device is connected to the programmer."""
-        output = self.run_commands(['connect', 'q'])
+        output = self.run_commands(['connect', 'qc'])
 
-        if 'FAILED' in output:
-            raise AdaLinkError('Could not find a JLink programmer, is it connected?')
+        # Pick out the failure message, reference voltage and found cores from
+        # the output in a single scan.
+        ref_voltage = None
+        found = False
+        connected = self._connected.encode('utf-8')
+        for match in _CONNECT_RE.finditer(output):
+            failed, voltage, core = match.groups()
+            if failed is not None:
+                raise AdaLinkError('Could not find a JLink programmer, is it connected?')
+            if voltage is not None and ref_voltage is None:
+                ref_voltage = voltage.decode('ascii')
+            if core is not None and core.startswith(connected):
+                found = True
 
-        voltage_match = re.search(r'VTref=([0-9.]+)V', output)
-        if not voltage_match:
+        if ref_voltage is None:
             raise AdaLinkError('JLink output lacks voltage information')
-        ref_voltage = voltage_match.group(1)
 
         logger.info('VTref={}V'.format(ref_voltage))
         if float(ref_voltage) < 1:
             raise AdaLinkError('JLink reference voltage is {}V, it the chip powered?'.format(ref_voltage))
 
-        findstr = 'Found {0}'.format(self._connected)
-        return output.find(findstr) != -1
+        return found
 
     def wipe(self):
         """Wipe clean the flash memory of the device.  Will happen before any
@@ -172,42 +247,58 @@ class JLink(Programmer):
             'r',      # Reset
             'erase',  # Erase
             'r',      # Reset
-            'q'       # Quit
+            'qc'      # Close connection and quit
         ]
         # Run commands.
         self.run_commands(commands)
 
-    def program(self, hex_files=[], bin_files=[]):
+    def program(self, hex_files=None, bin_files=None):
         """Program chip with provided list of hex and/or bin files.  Hex_files
         is a list of paths to .hex files, and bin_files is a list of tuples with
         the first value being the path to the .bin file and the second value
         being the integer starting address for the bin file."""
+        hex_files = [] if hex_files is None else hex_files
+        bin_files = [] if bin_files is None else bin_files
+        # Resolve relative paths against the working directory, which is only
+        # looked up once rather than by os.path.abspath for every file.
+        cwd = os.getcwd()
+        def _abs(path):
+            path = os.fspath(path)
+            if os.path.isabs(path):
+                return path
+            return os.path.normpath(os.path.join(cwd, path))
         # Build list of commands to program hex files.
-        commands = ['r']   # Reset
-        # Program each hex file.
-        for f in hex_files:
-            f = os.path.abspath(f)
-            commands.append('loadfile "{0}"'.format(f))
-        # Program each bin file.
-        for f, addr in bin_files:
-            f = os.path.abspath(f)
-            commands.append('loadbin "{0}" 0x{1:08X}'.format(f, addr))
-        commands.extend([
-            'r',  # Reset
-            'g',  # Run the MCU
-            'q'   # Quit
-        ])
+        commands = (
+            ['r'] +   # Reset
+            # Program each hex file.
+            ['loadfile "{0}"'.format(_abs(f)) for f in hex_files] +
+            # Program each bin file.
+            ['loadbin "{0}" 0x{1:08X}'.format(_abs(f), addr) for f, addr in bin_files] +
+            [
+                'r',  # Reset
+                'g',  # Run the MCU
+                'qc'  # Close connection and quit
+            ]
+        )
         # Run commands.
         self.run_commands(commands)
 
+    def readmem_batch(self, reads):
+        """Read several memory values at once.  Reads should be a list of
+        (address, width) tuples where width is 8, 16 or 32 bits.  Returns a
+        dict mapping each address to the value read from it.  An address can
+        only appear once in reads, otherwise an AdaLinkError is thrown.
+        """
+        return self._readmem(reads)
+
     def readmem32(self, address):
         """Read a 32-bit value from the provided memory address."""
-        return self._readmem(address, 'mem32')
+        return self._readmem([(address, 32)])[address]
 
     def readmem16(self, address):
         """Read a 16-bit value from the provided memory address."""
-        return self._readmem(address, 'mem16')
+        return self._readmem([(address, 16)])[address]
 
     def readmem8(self, address):
         """Read a 8-bit value from the provided memory address."""
-        return self._readmem(address, 'mem8')
+        return self._readmem([(address, 8)])[address]
@@ -14,13 +14,9 @@ import subprocess
 import threading
 import time
 
-from .base import Programmer
+from .base import Programmer, _tool_env
 from ..errors import AdaLinkError
 
-# OSX GUI-based app does not has the same PATH as terminal-based
-if platform.system() == 'Darwin':
-    os.environ["PATH"] = os.environ["PATH"] + ':/usr/local/bin'
-
 logger = logging.getLogger(__name__)
 
 
@@ -54,6 +50,8 @@ class RasPi2(Programmer):
                 openocd_exe = 'openocd.exe'
             else:
                 raise AdaLinkError('Unsupported system: {0}'.format(system))
+        # Run the tool with a PATH that can find it from OSX GUI-based apps too.
+        self._env = _tool_env()
         # Store the path to the OpenOCD tool so it can later be run.
         self._openocd_path = os.path.join(openocd_path, openocd_exe)
         logger.info('Using path to OpenOCD: {0}'.format(self._openocd_path))
@@ -70,8 +68,9 @@ class RasPi2(Programmer):
         # Spawn OpenOCD process with --version and capture its output.
         args = [self._openocd_path, '--version']
         try:
-            process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=self._env)
             output, err = process.communicate()
+            output = output.decode('utf-8', 'replace')
             # Parse out version number from response.
             match = re.search('^Open On-Chip Debugger (\S+)', output,
                               re.IGNORECASE | re.MULTILINE)
@@ -101,15 +100,21 @@ class RasPi2(Programmer):
         exception will be thrown. Set timeout_sec to None to disable the timeout
         completely.
         """
-        # Spawn OpenOCD process and capture its output.
-        args = [self._openocd_path]
-        args.extend(self._openocd_params)
-        for c in commands:
-            args.append('-c')
-            args.append('"{0}"'.format(c))
-        args = ' '.join(args)
+        return ''.join(self.run_commands_stream(commands, timeout_sec))
+
+    def run_commands_stream(self, commands, timeout_sec=60):
+        """Run the provided list of commands with OpenOCD like run_commands,
+        but yield each line of OpenOCD output as it is produced instead of
+        buffering all of it.  OpenOCD is always allowed to run to completion,
+        even if the caller stops iterating early.
+        """
+        # Spawn OpenOCD process and capture its output.  All the commands are
+        # passed to a single OpenOCD invocation, so build the whole command
+        # line in one join.
+        args = ' '.join([self._openocd_path] + self._openocd_params +
+                        ['-c "{0}"'.format(c) for c in commands])
         logger.debug('Running OpenOCD command: {0}'.format(args))
-        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, env=self._env)
         if timeout_sec is not None:
             # Use a timer to stop the subprocess if the timeout is exceeded.
             # This helps prevent very subtle issues with deadlocks on reading
@@ -120,13 +125,18 @@ class RasPi2(Programmer):
                 raise AdaLinkError('OpenOCD process exceeded timeout!')
             timeout = threading.Timer(timeout_sec, timeout_exceeded, [process])
             timeout.start()
-        # Grab output of OpenOCD.
-        output, err = process.communicate()
-        if timeout_sec is not None:
-            # Stop timeout timer when communicate call returns.
-            timeout.cancel()
-        logger.debug('OpenOCD response: {0}'.format(output))
-        return output
+        try:
+            # Grab output of OpenOCD.
+            for line in process.stdout:
+                line = line.decode('utf-8', 'replace')
+                logger.debug('OpenOCD response: %s', line.rstrip())
+                yield line
+        finally:
+            # Drain any remaining output and wait for OpenOCD to exit.
+            process.communicate()
+            if timeout_sec is not None:
+                # Stop timeout timer once the process has finished.
+                timeout.cancel()
 
     def _readmem(self, address, command):
         """Read the specified register with the provided register read command.
@@ -1,17 +1,15 @@
-from ez_setup import use_setuptools
-use_setuptools()
-from setuptools import setup, find_packages
+# Static package metadata lives in pyproject.toml, this script only provides
+# the version and keeps 'python setup.py develop' working.
+import os
 
-from adalink import __version__
+from setuptools import setup
 
 
-setup(name              = 'adalink',
-      version           = __version__,
-      author            = 'Tony DiCola',
-      author_email      = 'tdicola@adafruit.com',
-      description       = 'Cross platform tool for programming ARM chips using a Segger J-link or STLink V2 programmer (with OpenOCD).',
-      license           = 'MIT',
-      url               = 'https://github.com/adafruit/Adafruit_Adalink',
-      install_requires  = [],
-      entry_points      = {'console_scripts': ['adalink = adalink.main:main']},
-      packages          = find_packages())
+# Run just adalink/_version.py to get the version instead of importing the
+# whole adalink package (which isn't importable from a PEP 517 build anyway).
+version = {}
+with open(os.path.join(os.path.dirname(__file__), 'adalink', '_version.py')) as f:
+    exec(f.read(), version)
+
+
+setup(version=version['__version__'])